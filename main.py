@@ -1,4 +1,3 @@
-import configparser
 import datetime
 import os
 import sys
@@ -6,6 +5,7 @@ import tkinter.messagebox as tk_messagebox
 
 from send2trash import send2trash
 
+from utils.config_cache import get_config
 from utils.file_upload_selector import select_upload_files
 from utils.folder_selector import select_folder
 from utils.path_resolver import resolve_path
@@ -16,17 +16,21 @@ from utils.workspace_placeholder_replacer import WorkspacePlaceholderReplacer
 CONFIG_FILE_PATH = "config.ini"
 
 
+def escape_backslashes(path: str) -> str:
+    """パス内のバックスラッシュをエスケープした文字列を返す"""
+    return path.replace("\\", "\\\\")
+
+
 def main() -> int:
     if VSCodeMonitor.is_vscode_running():
         tk_messagebox.showerror("エラー", "別のVSCodeウィンドウが開かれているため、本ソフトウェアをご使用いただけません。\n先にすべてのVSCodeウィンドウを閉じてください。")
         return 1
 
-    config = configparser.ConfigParser()
-    config.read(resolve_path(CONFIG_FILE_PATH), "UTF-8")
+    config = get_config(resolve_path(CONFIG_FILE_PATH))
     main_config = config["MAIN"]
 
     drive_path_resolved = resolve_path(main_config["DRIVE_PATH"])
-    selected_folder = select_folder(drive_path_resolved)
+    selected_folder = select_folder(drive_path_resolved, config)
     if selected_folder is None:
         return 0  # 選択されないので終了
 
@@ -42,10 +46,15 @@ def main() -> int:
 
     selected_drive_path = os.path.join(drive_path_resolved, selected_folder)
 
+    # ワークスペースファイル(JSON)に埋め込むため、バックスラッシュをエスケープ
+    drive_parent_path_escaped = escape_backslashes(drive_path_resolved)
+    drive_path_escaped = escape_backslashes(selected_drive_path)
+    workspace_path_escaped = escape_backslashes(workspace_path)
+
     replacements = {
-        "%DRIVE_PARENT_PATH%": drive_path_resolved.replace("\\", "\\\\"),
-        "%DRIVE_PATH%": selected_drive_path.replace("\\", "\\\\"),
-        "%WORKSPACE_PATH%": workspace_path.replace("\\", "\\\\"),
+        "%DRIVE_PARENT_PATH%": drive_parent_path_escaped,
+        "%DRIVE_PATH%": drive_path_escaped,
+        "%WORKSPACE_PATH%": workspace_path_escaped,
     }
 
     base_workspace_file_path_resolved = resolve_path(main_config["BASE_WORKSPACE_FILE_PATH"])
@@ -77,7 +86,7 @@ def main() -> int:
 
     upload_exclude_list_file_resolved = resolve_path(main_config["UPLOAD_EXCLUDE_LIST_FILE_PATH"])
     try:
-        select_upload_files(workspace_path, drive_subfolder_path, upload_exclude_list_file_resolved)
+        select_upload_files(workspace_path, drive_subfolder_path, upload_exclude_list_file_resolved, config)
     except Exception as e:
         tk_messagebox.showerror("アップロードエラー", f"ファイルのアップロード処理の際にエラーが発生しました: {e}")
         return 1
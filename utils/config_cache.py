@@ -0,0 +1,32 @@
+import configparser
+import os
+
+_CACHE: dict[str, tuple[int, configparser.ConfigParser]] = {}
+
+
+def get_config(path: str) -> configparser.ConfigParser:
+    """
+    設定ファイルを読み込み、解析済みのConfigParserを返します。
+
+    同じパスに対しては、ファイルの更新時刻が変わらない限り前回の解析結果を再利用します。
+
+    引数
+    ----------
+    path : str
+        読み込む設定ファイルのパス。
+
+    戻り値
+    -------
+    configparser.ConfigParser
+        解析済みの設定。
+    """
+    mtime_ns = os.stat(path).st_mtime_ns
+
+    cached = _CACHE.get(path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
+    config = configparser.ConfigParser()
+    config.read(path, "UTF-8")
+    _CACHE[path] = (mtime_ns, config)
+    return config
@@ -1,21 +1,14 @@
 import configparser
-import glob
 import os
 import tkinter as tk
 import tkinter.messagebox as tk_messagebox
 import typing
 from tkinter import ttk
 
-import pyglet
-
+from .config_cache import get_config
+from .font_loader import add_font_file
 from .path_resolver import resolve_path
-from .upload_manager import UploadManager
-
-CONFIG_FILE_PATH = "config.ini"
-
-config = configparser.ConfigParser()
-config.read(resolve_path(CONFIG_FILE_PATH), "UTF-8")
-file_upload_selector_config = config["FILE_UPLOAD_SELECTOR"]
+from .upload_manager import DEFAULT_COPY_WORKERS, UploadManager
 
 
 class ExcludePattern:
@@ -26,8 +19,8 @@ class ExcludePattern:
     ----------
     file_path : str
         除外リストのファイルパス
-    exclude_patterns : List[str]
-        除外リストの項目を格納するリスト
+    exclude_patterns : FrozenSet[str]
+        除外リストの項目を格納する集合
     """
 
     def __init__(self, file_path: str) -> None:
@@ -42,36 +35,35 @@ class ExcludePattern:
         self._file_path = file_path
         self._exclude_patterns = self._load_exclude_patterns()
 
-    def _load_exclude_patterns(self) -> typing.List[str]:
+    def _load_exclude_patterns(self) -> typing.FrozenSet[str]:
         """
-        除外リストファイルを読み込み、リスト形式で返す。
+        除外リストファイルを読み込み、集合として返す。
 
         戻り値
         -------
-        List[str]
-            除外リストの各行を要素とするリスト
+        FrozenSet[str]
+            除外リストの空でない各行を要素とする集合
         """
         if os.path.exists(self._file_path):
-            with open(self._file_path, "r") as file:
-                return [line.strip() for line in file.readlines()]
-        return []
+            with open(self._file_path, "r", encoding="utf-8") as file:
+                return frozenset(filter(None, (line.strip() for line in file.read().splitlines())))
+        return frozenset()
 
-    def is_excluded(self, path: str) -> bool:
+    def is_excluded_name(self, name: str) -> bool:
         """
-        指定されたパスが除外リストに含まれているかを判定する。
+        指定されたファイル名・フォルダ名が除外リストに含まれているかを判定する。
 
         引数
         ----------
-        path : str
-            チェックするパス
+        name : str
+            チェックするファイル名・フォルダ名（パス区切りを含まない）
 
         戻り値
         -------
         bool
-            パスが除外リストに含まれていればTrue、含まれていなければFalse
+            名前が除外リストに含まれていればTrue、含まれていなければFalse
         """
-        folder_and_files = path.split("\\")
-        return any(exclude in folder_and_files for exclude in self._exclude_patterns)
+        return name in self._exclude_patterns
 
     def get_file_path(self) -> str:
         """
@@ -113,30 +105,70 @@ class FileManager:
         self._directory_path = directory_path
         self._exclude_patterns = exclude_patterns
 
-    def list_directory_contents(self) -> typing.List[str]:
+    def list_directory_contents(self) -> typing.List[typing.Tuple[str, bool, int]]:
         """
         ディレクトリ内のファイルとフォルダを除外リストを考慮して取得し、ディレクトリを先にソートして返す。
 
         戻り値
         -------
-        List[str]
-            除外リストを考慮したディレクトリとファイルのリスト。ディレクトリが先に表示される。
+        List[Tuple[str, bool, int]]
+            除外リストを考慮したディレクトリとファイルの相対パス、ディレクトリならTrueとなる真偽値、ファイルサイズ（ディレクトリは0）の組のリスト。ディレクトリが先に表示される。
         """
 
-        def is_subfile(item: str) -> bool:
-            """ファイル判定用ヘルパー関数"""
-            return "\\" in item or os.path.isdir(os.path.join(self._directory_path, item))
-
-        # 除外リストに含まれないアイテムを取得し、パスを整形
-        all_items = (file.removeprefix(self._directory_path + "\\") for file in glob.glob(self._directory_path + r"\**\*", recursive=True))
-        filtered_items = [item for item in all_items if not self._exclude_patterns.is_excluded(item)]
+        # 除外リストに含まれないアイテムを、ディレクトリ（とその中身）と直下のファイルに1回で振り分ける
+        subfiled_paths: typing.List[typing.Tuple[str, bool, int]] = []
+        non_subfiled_paths: typing.List[typing.Tuple[str, bool, int]] = []
+        for item, is_dir, size in self._walk():
+            if os.sep in item or is_dir:
+                subfiled_paths.append((item, is_dir, size))
+            else:
+                non_subfiled_paths.append((item, is_dir, size))
 
-        # ディレクトリとファイルに分けてソート
-        subfiled_paths = sorted(item for item in filtered_items if is_subfile(item))
-        non_subfiled_paths = sorted(item for item in filtered_items if item not in subfiled_paths)
+        # それぞれをソート
+        subfiled_paths.sort()
+        non_subfiled_paths.sort()
 
         return subfiled_paths + non_subfiled_paths
 
+    def _walk(self, rel: str = "") -> typing.Iterator[typing.Tuple[str, bool, int]]:
+        """
+        os.scandir でディレクトリを再帰的に走査し、相対パス、ディレクトリかどうか、ファイルサイズを返す。
+
+        glob と同様に、名前が「.」から始まる隠しファイル・フォルダは対象外とし、読み込めないディレクトリは無視する。
+        除外リストに含まれる名前のファイル・フォルダは返さず、フォルダの場合はその中も走査しない。
+
+        引数
+        ----------
+        rel : str
+            走査するディレクトリの、起点ディレクトリからの相対パス。空文字列なら起点ディレクトリ。
+
+        戻り値
+        -------
+        Iterator[Tuple[str, bool, int]]
+            起点ディレクトリからの相対パス、ディレクトリならTrueとなる真偽値、ファイルサイズ（ディレクトリは0）の組
+        """
+        sep = os.sep  # ループ内での属性参照を避ける
+        subdirs = []
+        try:
+            with os.scandir(os.path.join(self._directory_path, rel)) as entries:
+                for entry in entries:
+                    if entry.name.startswith(".") or self._exclude_patterns.is_excluded_name(entry.name):
+                        continue
+
+                    rel_path = rel + sep + entry.name if rel else entry.name
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    # Windowsではscandirの結果にサイズが含まれるため、追加のシステムコールは発生しない
+                    size = 0 if is_dir else entry.stat(follow_symlinks=False).st_size
+                    yield rel_path, is_dir, size
+
+                    if is_dir:
+                        subdirs.append(rel_path)
+        except OSError:
+            return
+
+        for subdir in subdirs:
+            yield from self._walk(subdir)
+
     def get_directory_path(self) -> str:
         """
         ファイル検索の起点となるディレクトリパスを返す
@@ -174,9 +206,17 @@ class FileUploadBrowserApp:
         ファイル管理を行うインスタンス
     check_vars : dict
         チェックボックス状態を保持する変数辞書
+    is_dir : dict
+        各アイテムがディレクトリかどうかを保持する辞書
+    children : dict
+        各フォルダから、その中にあるすべてのアイテムのリストへの辞書
+    file_sizes : dict
+        各ファイルのパスからファイルサイズへの辞書
+    config : configparser.SectionProxy
+        アップロードファイル選択UIの設定
     """
 
-    def __init__(self, root: tk.Tk, file_manager: FileManager, upload_manager: "UploadManager") -> None:
+    def __init__(self, root: tk.Tk, file_manager: FileManager, upload_manager: "UploadManager", config: configparser.SectionProxy) -> None:
         """
         コンストラクタ。アプリケーションウィンドウの設定とウィジェット生成を行う。
 
@@ -186,11 +226,19 @@ class FileUploadBrowserApp:
             Tkinterのルートウィンドウ
         file_manager : FileManager
             ファイル管理を行うインスタンス
+        config : configparser.SectionProxy
+            アップロードファイル選択UIの設定（config.iniのFILE_UPLOAD_SELECTORセクション）
         """
         self._root = root
         self._file_manager = file_manager
+        self._upload_manager = upload_manager
+        self._config = config
 
         self._check_vars: dict[str, tk.BooleanVar] = {}
+        self._is_dir: dict[str, bool] = {}
+        self._children: dict[str, list[str]] = {}
+        self._file_sizes: dict[str, int] = {}
+        self._bulk_update = False  # フォルダに連動してチェックを変更している間はTrue
         self._configure_window()
         self._create_widgets()
 
@@ -210,15 +258,13 @@ class FileUploadBrowserApp:
             self._root.destroy()
             return
 
-        self._setup_check_change_event()
-        self._upload_manager = upload_manager
         self._uploaded_files: set[str] = set()  # アップロード済みのファイルを保持するセット
 
     def _configure_window(self) -> None:
         """ウィンドウの基本設定を行う。"""
-        self._root.title(file_upload_selector_config["WINDOW_TITLE"])
-        self._root.geometry(f"{file_upload_selector_config["WINDOW_WIDTH"]}x{file_upload_selector_config["WINDOW_HEIGHT"]}")
-        icon_path = resolve_path(file_upload_selector_config["ICON_FILE"])
+        self._root.title(self._config["WINDOW_TITLE"])
+        self._root.geometry(f"{self._config["WINDOW_WIDTH"]}x{self._config["WINDOW_HEIGHT"]}")
+        icon_path = resolve_path(self._config["ICON_FILE"])
         icon_photo = tk.PhotoImage(file=icon_path)
         self._root.iconphoto(False, icon_photo)
         self._root.resizable(width=False, height=False)  # ウィンドウサイズを固定
@@ -229,16 +275,15 @@ class FileUploadBrowserApp:
     def _create_widgets(self) -> None:
         """ウィジェットを作成し、配置を行う。"""
 
-        # フォント設定
-        pyglet.options.win32_gdi_font = True
-        bizter_font_path = resolve_path(file_upload_selector_config["BIZTER_FONT_FILE"])
-        pyglet.font.add_file(bizter_font_path)
+        # フォント設定（フォルダー選択画面で登録済みの場合は何もしない）
+        bizter_font_path = resolve_path(self._config["BIZTER_FONT_FILE"])
+        add_font_file(bizter_font_path)
 
-        bizter_font = (file_upload_selector_config["BIZTER_FONT_FAMILY"], file_upload_selector_config.getint("BIZTER_FONT_SIZE"))
-        file_list_font = (file_upload_selector_config["FILE_LIST_FONT_FAMILY"], file_upload_selector_config.getint("FILE_LIST_FONT_SIZE"))
-        copyright_text_font = (file_upload_selector_config["BIZTER_FONT_FAMILY"], file_upload_selector_config.getint("COPYRIGHT_TEXT_FONT_SIZE"))
+        bizter_font = (self._config["BIZTER_FONT_FAMILY"], self._config.getint("BIZTER_FONT_SIZE"))
+        file_list_font = (self._config["FILE_LIST_FONT_FAMILY"], self._config.getint("FILE_LIST_FONT_SIZE"))
+        copyright_text_font = (self._config["BIZTER_FONT_FAMILY"], self._config.getint("COPYRIGHT_TEXT_FONT_SIZE"))
 
-        tk.Label(self._root, text=file_upload_selector_config["INSTRUCTION_TEXT"], font=bizter_font, fg="black").grid(row=0, column=0, padx=10, pady=10)
+        tk.Label(self._root, text=self._config["INSTRUCTION_TEXT"], font=bizter_font, fg="black").grid(row=0, column=0, padx=10, pady=10)
 
         self._file_list_frame = ttk.Frame(self._root)
         self._file_list_frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=(0, 10))
@@ -265,7 +310,7 @@ class FileUploadBrowserApp:
 
         self._populate_filtered_file_list(file_list_font)
 
-        copyright = tk.Label(self._root, text=file_upload_selector_config["COPYRIGHT_TEXT"], anchor="center", font=copyright_text_font)
+        copyright = tk.Label(self._root, text=self._config["COPYRIGHT_TEXT"], anchor="center", font=copyright_text_font)
         copyright.pack(side="bottom")
 
     def _populate_filtered_file_list(self, font: typing.Tuple[str, int]) -> None:
@@ -283,13 +328,13 @@ class FileUploadBrowserApp:
         style = ttk.Style()
         style.configure(
             "frame.TFrame",
-            background=file_upload_selector_config["FRAME_BG_COLOR"],
+            background=self._config["FRAME_BG_COLOR"],
         )
         scrollable_frame = ttk.Frame(canvas, borderwidth=10, relief="groove", style="frame.TFrame")
 
         scrollable_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
 
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw", width=file_upload_selector_config.getint("WINDOW_WIDTH") - 50)
+        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw", width=self._config.getint("WINDOW_WIDTH") - 50)
         canvas.configure(yscrollcommand=scrollbar.set)
 
         # マウスホイールでスクロールできるように設定
@@ -305,23 +350,32 @@ class FileUploadBrowserApp:
             self._root.destroy()
             return
 
-        for item in list_directory_contents:
+        directory_path = self._file_manager.get_directory_path()
+        for item, is_dir, size in list_directory_contents:
             var = tk.BooleanVar(value=True)
-            file_name = item.rsplit("\\")[-1]
-            is_file = os.path.isfile(os.path.join(self._file_manager.get_directory_path(), item))
+            var.trace_add("write", lambda *args, item=item: self._on_selection_change(item))
+            file_name = item.rsplit(os.sep)[-1]
 
             # ディレクトリの場合は名前の後ろに「/」を追加
-            display_name = f"{file_name} /" if not is_file else file_name
+            display_name = f"{file_name} /" if is_dir else file_name
 
             widget = tk.Checkbutton(
                 scrollable_frame,
                 text=display_name,
                 variable=var,
                 font=font,
-                background=file_upload_selector_config["FRAME_BG_COLOR"],
+                background=self._config["FRAME_BG_COLOR"],
             )
-            widget.pack(anchor="w", padx=30 * item.count("\\"), pady=0)  # 行間を小さくするためにpadyを0に設定
+            widget.pack(anchor="w", padx=30 * item.count(os.sep), pady=0)  # 行間を小さくするためにpadyを0に設定
             self._check_vars[item] = var
+            self._is_dir[item] = is_dir
+            if not is_dir:
+                self._file_sizes[os.path.join(directory_path, item)] = size
+
+            # すべての親フォルダの子として登録
+            parts = item.split(os.sep)
+            for depth in range(1, len(parts)):
+                self._children.setdefault(os.sep.join(parts[:depth]), []).append(item)
 
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
@@ -335,13 +389,18 @@ class FileUploadBrowserApp:
         List[str]
             選択されたファイルのリスト
         """
-        select_files_folders = [os.path.join(self._file_manager.get_directory_path(), item) for item, var in self._check_vars.items() if var.get()]
-        return [select_files_folder for select_files_folder in select_files_folders if os.path.isfile(select_files_folder)]
+        directory_path = self._file_manager.get_directory_path()
+        return [os.path.join(directory_path, item) for item, var in self._check_vars.items() if not self._is_dir[item] and var.get()]
 
     def _on_close(self) -> None:
         """
         ウィンドウが閉じられたときの処理。選択されたファイルを空のリストに設定する。
         """
+        # コピー中に閉じるとコピー元のファイルが削除されてしまうため、コピーが終わるまでは閉じない
+        if self._upload_manager.is_copying():
+            tk_messagebox.showwarning("警告", "ファイルをコピーしています。コピーが終わるまでお待ちください。")
+            return
+
         if not self._uploaded_files:
             delete_confirmed = tk_messagebox.askokcancel(
                 f"警告",
@@ -373,7 +432,7 @@ class FileUploadBrowserApp:
             new_files = [item for item in selected_items if item not in self._uploaded_files]
 
             if new_files:
-                self._upload_manager.upload_files(new_files)  # 一度にアップロードする
+                self._upload_manager.upload_files(new_files, self._file_sizes)  # 一度にアップロードする
 
             self._root.after(500, self._update_progress)  # 0.5秒後から進捗を更新
         else:
@@ -381,24 +440,26 @@ class FileUploadBrowserApp:
 
     def _update_progress(self):
         """プログレスバーを更新する。"""
-        progress = self._upload_manager.get_upload_progress()
+        try:
+            progress = self._upload_manager.get_upload_progress()
+        except Exception as e:
+            self._message_label.config(text="エラー：アップロードに失敗しました", fg="red")
+            self._upload_button.config(state="normal")
+            tk_messagebox.showerror("アップロードエラー", f"ファイルのコピー中にエラーが発生しました：{e}")
+            return
+
         self._progress_bar["value"] = progress
 
         if progress < 0:
             self._message_label.config(text="アップロードをキャンセルしました", fg="red")
             self._upload_button.config(state="normal")  # アップロード完了後にボタンを再度有効にする
         elif progress < 100:
-            self._root.after(1000, self._update_progress)  # 1秒ごとに進捗を更新
+            self._root.after(250, self._update_progress)  # 0.25秒ごとに進捗を更新（完了またはキャンセルで停止）
         else:
             self._message_label.config(text="アップロードが完了しました", fg="green")
             self._upload_button.config(state="normal")
             self._uploaded_files.update(self._get_selected_files())
 
-    def _setup_check_change_event(self):
-        """各チェックボックスの変化イベントに _on_check_change メソッドをセット"""
-        for item, var in self._check_vars.items():
-            var.trace_add("write", lambda *args, item=item: self._on_selection_change(item))
-
     def _on_selection_change(self, item: str):
         """
         フォルダのチェック状態が変化した場合、フォルダ内のアイテムも連動してチェックまたはアンチェックする。
@@ -408,17 +469,23 @@ class FileUploadBrowserApp:
         item : str
             チェック状態が変更されたアイテム
         """
+        if self._bulk_update:
+            return  # 親フォルダに連動した変更では、さらに連動させない
+
         is_checked = self._check_vars[item].get()
 
         # フォルダの場合のみ、フォルダ内のアイテムに連動
-        if os.path.isdir(os.path.join(self._file_manager.get_directory_path(), item)):  # フォルダ判定
+        if self._is_dir[item]:  # フォルダ判定
             # フォルダ内の全アイテムのチェックを変更
-            for sub_item in self._check_vars:
-                if sub_item.startswith(f"{item}\\"):
-                    self._check_vars[sub_item].set(is_checked)  # アップロード完了後にボタンを再度有効にする
+            self._bulk_update = True
+            try:
+                for sub_item in self._children.get(item, ()):
+                    self._check_vars[sub_item].set(is_checked)
+            finally:
+                self._bulk_update = False
 
 
-def select_upload_files(src_dir_path: str, dst_folder_path: str, exclude_pattern_file_path: str) -> None:
+def select_upload_files(src_dir_path: str, dst_folder_path: str, exclude_pattern_file_path: str, config: configparser.ConfigParser) -> None:
     """
     ファイル選択ダイアログを表示し、選択されたファイルのリストを返す。
 
@@ -430,23 +497,31 @@ def select_upload_files(src_dir_path: str, dst_folder_path: str, exclude_pattern
         アップロード先のフォルダパス
     exclude_pattern_file_path : str
         除外リストのファイルパス
+    config : configparser.ConfigParser
+        解析済みのconfig.ini
     """
     root = tk.Tk()
 
     exclude_patterns = ExcludePattern(exclude_pattern_file_path)
     file_manager = FileManager(src_dir_path, exclude_patterns)
-    upload_manager = UploadManager()
+    # UPLOAD_MANAGER セクションがない古い config.ini でも既定値で動作させる
+    copy_workers = config.getint("UPLOAD_MANAGER", "COPY_WORKERS", fallback=DEFAULT_COPY_WORKERS)
+    upload_manager = UploadManager(copy_workers)
 
     upload_manager.set_src_dir(src_dir_path)
     upload_manager.set_dst_folder(dst_folder_path)
 
-    FileUploadBrowserApp(root, file_manager, upload_manager)
+    FileUploadBrowserApp(root, file_manager, upload_manager, config["FILE_UPLOAD_SELECTOR"])
 
     root.mainloop()
 
+    # 呼び出し元はこの後コピー元フォルダを削除するため、コピーの完了を待ってから戻る
+    upload_manager.wait_for_copies()
+
 
 if __name__ == "__main__":
+    CONFIG_FILE_PATH = "config.ini"  # 設定ファイルのパス
     EXCLUDE_LIST_FILE = "exclude_list.txt"  # 除外リストのファイルパス
     SOURCE_DIRECTORY_PATH = r"C:\Users\Roy\Desktop\swimmy_python"  # ディレクトリパス
     DST_FOLDER_PATH = r"C:\Users\Roy\Google ドライブ\エキスパート\A＿あああいあうあえあお"
-    select_upload_files(SOURCE_DIRECTORY_PATH, DST_FOLDER_PATH, EXCLUDE_LIST_FILE)
+    select_upload_files(SOURCE_DIRECTORY_PATH, DST_FOLDER_PATH, EXCLUDE_LIST_FILE, get_config(resolve_path(CONFIG_FILE_PATH)))
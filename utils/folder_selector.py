@@ -1,19 +1,13 @@
 import configparser
 import os
+import stat
 import tkinter as tk
 import tkinter.font as tk_font
 import tkinter.messagebox as tk_messagebox
 
-import pyglet
-
+from .font_loader import add_font_file
 from .path_resolver import resolve_path
 
-CONFIG_FILE_PATH = "config.ini"
-
-config = configparser.ConfigParser()
-config.read(resolve_path(CONFIG_FILE_PATH), "UTF-8")
-folder_selector_config = config["FOLDER_SELECTOR"]
-
 
 class FolderLister:
     """指定されたディレクトリ内のフォルダーをリストするクラス
@@ -30,21 +24,49 @@ class FolderLister:
             フォルダーをリストするディレクトリのパス
         """
         self.directory = directory
+        self._cached_mtime_ns: int | None = None
+        self._cached_folders: list[str] = []
 
     def list_folders(self) -> list[str]:
         """指定されたディレクトリ内のフォルダーのみをリストで返す
 
+        ディレクトリの更新時刻が前回と変わっていなければ、前回の結果を再利用する。
+
         戻り値
         -------
         list[str]
             フォルダー名のリスト
         """
         try:
-            with os.scandir(self.directory) as entries:
-                return sorted([entry.name for entry in entries if entry.is_dir()])
+            directory_stat = os.stat(self.directory)
         except FileNotFoundError:
             tk_messagebox.showerror("エラー", f"ディレクトリ {self.directory} が見つかりません。")
             return []
+        except OSError as e:
+            tk_messagebox.showerror("エラー", f"ディレクトリ {self.directory} にアクセスできません: {e}")
+            return []
+
+        if not stat.S_ISDIR(directory_stat.st_mode):
+            tk_messagebox.showerror("エラー", f"{self.directory} はディレクトリではありません。")
+            return []
+
+        if directory_stat.st_mtime_ns == self._cached_mtime_ns:
+            return list(self._cached_folders)
+
+        folders = []
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        folders.append(entry.name)
+        except OSError as e:
+            tk_messagebox.showerror("エラー", f"ディレクトリ {self.directory} の読み込み中にエラーが発生しました: {e}")
+            return []
+        folders.sort()
+
+        self._cached_mtime_ns = directory_stat.st_mtime_ns
+        self._cached_folders = folders
+        return list(folders)
 
 
 class FolderSelectorUI:
@@ -53,11 +75,12 @@ class FolderSelectorUI:
     属性:
         root (tk.Tk): Tkinterのルートウィンドウ
         folder_lister (FolderLister): フォルダーリストを管理するオブジェクト
+        config (configparser.SectionProxy): フォルダー選択UIの設定
         selected_folder (str | None): 選択されたフォルダー名
         font (tk_font.Font): 使用するフォント
     """
 
-    def __init__(self, root: tk.Tk, folder_lister: FolderLister) -> None:
+    def __init__(self, root: tk.Tk, folder_lister: FolderLister, config: configparser.SectionProxy) -> None:
         """
         引数
         ----------
@@ -65,15 +88,17 @@ class FolderSelectorUI:
             Tkinterのルートウィンドウ
         folder_lister : FolderLister
             フォルダーリストを管理するオブジェクト
+        config : configparser.SectionProxy
+            フォルダー選択UIの設定（config.iniのFOLDER_SELECTORセクション）
         """
         self.root = root
         self.folder_lister = folder_lister
+        self.config = config
         self.selected_folder = None
 
-        pyglet.options.win32_gdi_font = True
-        font_path = resolve_path(folder_selector_config["BIZTER_FONT_FILE"])
-        pyglet.font.add_file(font_path)
-        self.font = tk_font.Font(family=folder_selector_config["BIZTER_FONT_FAMILY"], size=folder_selector_config.getint("BIZTER_FONT_SIZE"))
+        font_path = resolve_path(self.config["BIZTER_FONT_FILE"])
+        add_font_file(font_path)
+        self.font = tk_font.Font(family=self.config["BIZTER_FONT_FAMILY"], size=self.config.getint("BIZTER_FONT_SIZE"))
 
         self._initialize_ui()
 
@@ -85,16 +110,16 @@ class FolderSelectorUI:
 
     def _configure_root(self) -> None:
         """ルートウィンドウのプロパティを設定"""
-        self.root.title(folder_selector_config["WINDOW_TITLE"])
-        self._center_window(folder_selector_config.getint("WINDOW_WIDTH"), folder_selector_config.getint("WINDOW_HEIGHT"))
+        self.root.title(self.config["WINDOW_TITLE"])
+        self._center_window(self.config.getint("WINDOW_WIDTH"), self.config.getint("WINDOW_HEIGHT"))
         self.root.resizable(False, False)
-        icon_path = resolve_path(folder_selector_config["ICON_FILE"])
+        icon_path = resolve_path(self.config["ICON_FILE"])
         icon_photo = tk.PhotoImage(file=icon_path)
         self.root.iconphoto(False, icon_photo)
 
     def _create_label(self) -> None:
         """指示ラベルを作成"""
-        label = tk.Label(self.root, text=folder_selector_config["INSTRUCTION_TEXT"], anchor="w", font=self.font)
+        label = tk.Label(self.root, text=self.config["INSTRUCTION_TEXT"], anchor="w", font=self.font)
         label.pack(fill="x", padx=20, pady=(20, 5))
 
     def _create_listbox_with_scrollbar(self) -> None:
@@ -106,10 +131,8 @@ class FolderSelectorUI:
         scrollbar = tk.Scrollbar(frame)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-        folders = self.folder_lister.list_folders()
         self.folder_listbox = tk.Listbox(
             frame,
-            listvariable=tk.StringVar(value=folders),
             height=20,
             width=20,
             font=self.font,
@@ -119,6 +142,11 @@ class FolderSelectorUI:
         self.folder_listbox.pack(side=tk.LEFT, fill=tk.BOTH)
         scrollbar.config(command=self.folder_listbox.yview)
 
+        # StringVarを経由せず、フォルダー名を一度の呼び出しでまとめて挿入
+        folders = self.folder_lister.list_folders()
+        if folders:
+            self.folder_listbox.insert(tk.END, *folders)
+
         self.folder_listbox.bind("<<ListboxSelect>>", self.on_folder_selected)
 
     def _center_window(self, width: int, height: int) -> None:
@@ -165,16 +193,20 @@ class FolderSelectorApp:
 
     属性:
         directory (str): フォルダーをリストするディレクトリのパス
+        config (configparser.SectionProxy): フォルダー選択UIの設定
     """
 
-    def __init__(self, directory: str) -> None:
+    def __init__(self, directory: str, config: configparser.SectionProxy) -> None:
         """
         引数
         ----------
         directory : str
             フォルダーをリストするディレクトリのパス
+        config : configparser.SectionProxy
+            フォルダー選択UIの設定（config.iniのFOLDER_SELECTORセクション）
         """
         self.directory = directory
+        self.config = config
 
     def run(self) -> str | None:
         """フォルダー選択アプリケーションを実行し、選択されたフォルダーを返す
@@ -186,23 +218,25 @@ class FolderSelectorApp:
         """
         root = tk.Tk()
         folder_lister = FolderLister(self.directory)
-        ui = FolderSelectorUI(root, folder_lister)
+        ui = FolderSelectorUI(root, folder_lister, self.config)
         root.mainloop()
         return ui.selected_folder
 
 
-def select_folder(directory: str) -> str | None:
+def select_folder(directory: str, config: configparser.ConfigParser) -> str | None:
     """フォルダー選択アプリケーションを起動し、選択されたフォルダーを返す
 
     引数
     ----------
     directory : str
         フォルダーをリストするディレクトリのパス
+    config : configparser.ConfigParser
+        解析済みのconfig.ini
 
     戻り値
     -------
     str | None
         選択されたフォルダー名、またはNone
     """
-    app = FolderSelectorApp(directory)
+    app = FolderSelectorApp(directory, config["FOLDER_SELECTOR"])
     return app.run()
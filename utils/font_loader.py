@@ -0,0 +1,22 @@
+import pyglet
+
+_FONTS_LOADED: set[str] = set()
+
+
+def add_font_file(font_path: str) -> None:
+    """
+    フォントファイルをシステムに登録します。
+
+    同じパスのフォントファイルはプロセス内で一度だけ登録し、2回目以降の呼び出しでは何もしません。
+
+    引数
+    ----------
+    font_path : str
+        登録するフォントファイルのパス。
+    """
+    if font_path in _FONTS_LOADED:
+        return
+
+    pyglet.options.win32_gdi_font = True
+    pyglet.font.add_file(font_path)
+    _FONTS_LOADED.add(font_path)
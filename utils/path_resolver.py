@@ -1,12 +1,18 @@
+import functools
 import os
 import sys
 
+# 相対パスの基準となるexeのディレクトリ
+_BASE_DIR = os.path.dirname(os.path.abspath(sys.argv[0]))
 
+
+@functools.lru_cache(maxsize=None)
 def resolve_path(path: str) -> str:
     """
     指定されたパスを絶対パスとして解決します。
 
     絶対パスならそのまま返し、相対パスならexeのディレクトリからの相対パスで解決します。また、`~`から始まる場合はユーザーホームからのパスを返します。
+    同じパスに対する結果はキャッシュされます。
 
     引数
     ----------
@@ -34,5 +40,4 @@ def resolve_path(path: str) -> str:
         return path
 
     # 相対パスならこの関数が入っているファイルのディレクトリからのパスを返す
-    current_file_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
-    return os.path.join(current_file_dir, path)
+    return os.path.join(_BASE_DIR, path)
@@ -1,13 +1,17 @@
+import array
 import ctypes
 import ctypes.wintypes
 import os
-import pathlib
 import shutil
+import threading
 import tkinter.messagebox as tk_messagebox
-import typing
+from concurrent.futures import Future, ThreadPoolExecutor
 
 import win32con  # type: ignore
 
+PATH_SEPARATORS = os.sep + (os.altsep or "")  # パスの区切り文字
+DEFAULT_COPY_WORKERS = 8  # config.ini に COPY_WORKERS がない場合の並列コピー数
+
 # Windows Shell API の定数
 SHGFI_ICON = 0x000000100  # アイコンを取得するためのフラグ
 SHGFI_OVERLAYINDEX = 0x000000040  # オーバーレイアイコンのインデックスを取得するためのフラグ
@@ -50,7 +54,7 @@ class OverlayIconFetcher:
 
     def __init__(self) -> None:
         self._shell32 = ctypes.windll.shell32
-        self._shfi = SHFILEINFO()
+        self._user32 = ctypes.windll.user32
 
     def get_overlay_index(self, file_path: str) -> int | None:
         """指定したファイルパスのオーバーレイアイコンインデックスを取得します。
@@ -67,15 +71,28 @@ class OverlayIconFetcher:
             エラーが発生した場合は None を返します。
         """
         try:
-            self._shell32.SHGetFileInfoW(file_path, win32con.FILE_ATTRIBUTE_NORMAL, ctypes.byref(self._shfi), ctypes.sizeof(self._shfi), SHGFI_ICON | SHGFI_OVERLAYINDEX)
+            # 複数のスレッドから呼ばれるため、構造体は呼び出しごとに用意する
+            shfi = SHFILEINFO()
+            self._shell32.SHGetFileInfoW(file_path, win32con.FILE_ATTRIBUTE_NORMAL, ctypes.byref(shfi), ctypes.sizeof(shfi), SHGFI_ICON | SHGFI_OVERLAYINDEX)
+            # SHGFI_OVERLAYINDEX には SHGFI_ICON が必要なため、作成されたアイコンはすぐに破棄する
+            if shfi.hIcon:
+                self._user32.DestroyIcon(shfi.hIcon)
             # iIcon の上位8ビットからオーバーレイインデックスを取得
-            overlay_index = self._shfi.iIcon >> 24
+            overlay_index = shfi.iIcon >> 24
             return overlay_index
         except Exception as e:
             print(f"エラーが発生しました: {e}")
             return None
 
 
+def _initialize_com() -> None:
+    """コピー用スレッドで COM を初期化する。
+
+    バックグラウンドスレッドから SHGetFileInfoW を呼ぶ前に必要です。
+    """
+    ctypes.windll.ole32.CoInitialize(None)
+
+
 class UploadManager:
     """ファイルのアップロード進捗状況を管理するクラス。
 
@@ -84,10 +101,32 @@ class UploadManager:
 
     属性
     ----------
-    _file_statuses : dict
-        ファイルごとの初期オーバーレイインデックスと変更状態の辞書
+    _paths : list[str]
+        状態を管理しているコピー先ファイルのパスのリスト
+    _path_indices : dict[str, int]
+        コピー先ファイルのパスから _paths 内のインデックスへの辞書
+    _pending_files : set[str]
+        オーバーレイがまだ変化していないコピー先ファイルのパスの集合
+    _initial_overlays : array.array
+        ファイルごとの初期オーバーレイインデックス（_paths と同じ順序）
+    _sizes : array.array
+        ファイルごとのバイトサイズ（_paths と同じ順序）
+    _changed : bytearray
+        ファイルごとの変更状態（1なら変更済み、_paths と同じ順序）
+    _total_size : int
+        アップロード対象の全ファイルの総バイトサイズ
+    _copied_size : int
+        コピーが終わったファイルの総バイトサイズ
+    _completed_size : int
+        変更済み（アップロード完了）のファイルの総バイトサイズ
+    _futures : list[Future]
+        実行中のコピー処理
+    _executor : ThreadPoolExecutor | None
+        コピー処理を実行しているスレッドプール
     _progress : int
         現在のアップロード進捗（0-100%）
+    _copy_workers : int
+        ファイルを並列にコピーするスレッド数
     _src_dir : str
         コピー元のディレクトリパス
     _dst_folder : str
@@ -99,23 +138,46 @@ class UploadManager:
         コピー元のディレクトリパスを設定する。
     set_dst_folder(dst_folder: str) -> None
         コピー先のフォルダパスを設定する。
-    upload_files(file_list: list[str]) -> None
-        指定されたファイルのリストをコピーし、初期状態を記録する。
+    upload_files(file_list: list[str], file_sizes: dict[str, int]) -> None
+        指定されたファイルのリストのコピーをバックグラウンドで開始する。
     get_upload_progress() -> int
         現在の進捗状況を取得する。
+    is_copying() -> bool
+        コピー中のファイルがあるかを返す。
+    wait_for_copies() -> None
+        実行中のコピーがすべて終わるまで待つ。
     delete_file(path: str) -> None
         指定されたファイルを削除し、状態管理から削除する。
     """
 
-    def __init__(self) -> None:
+    def __init__(self, copy_workers: int = DEFAULT_COPY_WORKERS) -> None:
         """UploadManagerの初期化。
 
-        空の進捗状況と状態管理用辞書を初期化します。
+        空の進捗状況と状態管理用の配列を初期化します。
+
+        引数
+        ----------
+        copy_workers : int
+            ファイルを並列にコピーするスレッド数。1未満の場合は1として扱います。
         """
-        self._file_statuses: dict[str, dict[str, typing.Any]] = {}
+        self._copy_workers = max(1, copy_workers)
+        self._paths: list[str] = []
+        self._path_indices: dict[str, int] = {}
+        self._pending_files: set[str] = set()
+        self._initial_overlays = array.array("i")
+        self._sizes = array.array("q")
+        self._changed = bytearray()
         self._progress: int = 0
+        self._total_size: int = 0
+        self._copied_size: int = 0
+        self._completed_size: int = 0
+        self._futures: list[Future] = []
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
         self._src_dir: str = ""
+        self._src_prefix_len: int = 0
         self._dst_folder: str = ""
+        self._dst_prefix: str = ""
         self._overlay_icon_fetcher = OverlayIconFetcher()
 
     def set_src_dir(self, src_dir: str) -> None:
@@ -127,7 +189,8 @@ class UploadManager:
             コピー元のディレクトリパス。
         """
         self._src_dir = src_dir
-        self._src_dir_obj = pathlib.Path(self._src_dir)
+        # コピー元ファイルのパスは「src_dir + 区切り文字 + 相対パス」の形になるため、先頭を切り落とす長さを求めておく
+        self._src_prefix_len = len(self._src_dir.rstrip(PATH_SEPARATORS)) + 1
 
     def set_dst_folder(self, dst_folder: str) -> None:
         """コピー先のフォルダパスを設定する。
@@ -137,12 +200,12 @@ class UploadManager:
         dst_folder : str
             コピー先のフォルダパス。
         """
-        self._dst_folder = dst_folder
-        self._dst_folder_obj = pathlib.Path(self._dst_folder)
+        self._dst_folder = os.path.normpath(dst_folder)
+        self._dst_prefix = self._dst_folder.rstrip(PATH_SEPARATORS) + os.sep
 
     def _get_relative_path(self, path: str) -> str:
         """
-        パスの相対パスを生成します。
+        パスの相対パスを生成します。path は `src_dir` 内のファイルのパスであること。
 
         引数
         ----------
@@ -154,9 +217,7 @@ class UploadManager:
         str
             生成された相対パス。
         """
-        source_path_obj = pathlib.Path(path)
-
-        return str(source_path_obj.relative_to(self._src_dir_obj))
+        return path[self._src_prefix_len :]
 
     def _get_new_path(self, path: str) -> str:
         """
@@ -172,56 +233,104 @@ class UploadManager:
         str
             生成された新しいファイルパス。
         """
-        source_path_obj = pathlib.Path(path)
+        return self._dst_prefix + path[self._src_prefix_len :]
+
+    def _index_destination(self) -> set[str]:
+        """
+        コピー先フォルダ内に既に存在するファイルの相対パスを収集します。
 
-        return str(self._dst_folder_obj / source_path_obj.relative_to(self._src_dir_obj))
+        ファイルごとに存在確認を行う代わりに、os.scandir でコピー先を一度だけ走査します。
 
-    def upload_files(self, file_list: list[str]) -> None:
-        """指定されたファイルリストをコピーし、初期オーバーレイインデックスを取得して記録する。
+        戻り値
+        -------
+        set[str]
+            コピー先フォルダからの相対パス（os.path.normcase 済み）の集合。コピー先が存在しない場合は空集合。
+        """
+        existing: set[str] = set()
+        pending_dirs = [""]
+
+        while pending_dirs:
+            rel_dir = pending_dirs.pop()
+            try:
+                with os.scandir(os.path.join(self._dst_folder, rel_dir)) as entries:
+                    for entry in entries:
+                        rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            pending_dirs.append(rel_path)
+                        elif entry.is_file(follow_symlinks=False):
+                            existing.add(os.path.normcase(rel_path))
+            except (FileNotFoundError, NotADirectoryError):
+                continue  # コピー先がまだ存在しない場合は無視
+
+        return existing
+
+    def upload_files(self, file_list: list[str], file_sizes: dict[str, int]) -> None:
+        """指定されたファイルリストのコピーをバックグラウンドで開始する。
+
+        上書き確認とコピー先フォルダの作成を行ってからコピーを開始し、コピーの完了を待たずに戻ります。
+        各ファイルの初期オーバーレイインデックスは、コピーが終わり次第記録されます。
 
         引数
         ----------
         file_list : list of str
             コピーしたいファイルのパスのリスト。
+        file_sizes : dict of str to int
+            ファイルのパスからファイルサイズへの辞書。file_list のすべてのパスを含むこと。
         """
         self._progress = 0
-        self._file_statuses.clear()
+        self._clear_statuses()
+        self._futures = []
         self._src_files = file_list  # コピー元ファイルのリストを格納
         self._total_size = 0  # 全ファイルの総バイトサイズ
+        self._copied_size = 0  # コピーが終わったファイルのバイトサイズ
         self._completed_size = 0  # 完了したファイルのバイトサイズ
 
-        existing_files = [src_file for src_file in self._src_files if os.path.isfile(self._get_new_path(src_file))]
+        existing = self._index_destination()
+        existing_files = [src_file for src_file in self._src_files if os.path.normcase(self._get_relative_path(src_file)) in existing]
 
-        # 上書き確認と既存ファイル削除
+        # 上書き確認（shutil.copy2 は既存ファイルを上書きするため、事前の削除は不要）
         if existing_files:
             already_existing_files_str = "\n・".join(map(self._get_relative_path, existing_files))
             overwrite_confirmed = tk_messagebox.askokcancel("警告", f"以下のファイルは既に存在します。上書きしますか？\n・{already_existing_files_str}")
-            if overwrite_confirmed:
-                for already_existing_file in existing_files:
-                    os.remove(self._get_new_path(already_existing_file))
-            else:
+            if not overwrite_confirmed:
                 self._progress = -1
                 return  # 上書きしない場合は処理を中断
 
-        # ファイルをコピーして、初期オーバーレイアイコンインデックスを取得
-        for src_file in self._src_files:
-            new_path = self._get_new_path(src_file)
-            new_dir_path = os.path.dirname(new_path)
-            os.makedirs(new_dir_path, exist_ok=True)
-            copied_file_path = shutil.copy2(src_file, new_path)
+        # コピー先のフォルダを重複なく先に作成
+        dirs_needed = {os.path.dirname(self._get_new_path(src_file)) for src_file in self._src_files}
+        for dir_path in sorted(dirs_needed):
+            os.makedirs(dir_path, exist_ok=True)
+
+        # 0バイトのファイルは1バイトと見なす
+        src_file_sizes = [max(1, file_sizes[src_file]) for src_file in self._src_files]
+        self._total_size = sum(src_file_sizes)
+
+        # ファイルをバックグラウンドで並列にコピー
+        self._executor = ThreadPoolExecutor(max_workers=min(self._copy_workers, len(self._src_files)), initializer=_initialize_com)
+        self._futures = [self._executor.submit(self._copy_one, src_file, file_size) for src_file, file_size in zip(self._src_files, src_file_sizes)]
+        self._executor.shutdown(wait=False)
+
+    def _copy_one(self, src_file: str, file_size: int) -> None:
+        """1つのファイルをコピー先にコピーし、初期オーバーレイアイコンインデックスを記録する。
 
-            # ファイルサイズを取得し、0バイトの場合は1バイトと見なす
-            file_size = max(1, os.path.getsize(src_file))
-            self._total_size += file_size
+        コピー用のスレッドで実行されます。コピー先のフォルダは作成済みであること。
 
-            # オーバーレイアイコンインデックスを取得し、ファイル状態を初期化
-            initial_overlay_index = self._overlay_icon_fetcher.get_overlay_index(copied_file_path)
+        引数
+        ----------
+        src_file : str
+            コピー元ファイルのパス。
+        file_size : int
+            ファイルサイズ（0バイトの場合は1バイトと見なす）。
+        """
+        new_path = self._get_new_path(src_file)
+        copied_file_path = shutil.copy2(src_file, new_path)
+
+        # オーバーレイアイコンインデックスを取得し、ファイル状態を初期化
+        initial_overlay_index = self._overlay_icon_fetcher.get_overlay_index(copied_file_path)
+        with self._lock:
+            self._copied_size += file_size
             if initial_overlay_index is not None:
-                self._file_statuses[copied_file_path] = {
-                    "initial_overlay": initial_overlay_index,
-                    "changed": False,
-                    "size": file_size,
-                }
+                self._add_status(copied_file_path, initial_overlay_index, file_size)
             else:
                 print(f"Failed to retrieve overlay index for {copied_file_path}")
 
@@ -229,28 +338,67 @@ class UploadManager:
         """現在の進捗状況を取得する。
 
         ファイルのオーバーレイアイコンインデックスを確認し、前回と異なる場合に進捗を更新します。
+        コピー中のファイルは0%、コピー済みでオーバーレイが変化していないファイルは50%として数えます。
 
         戻り値
         -------
         int
             現在の進捗状況（0から100の範囲）。
         """
-        self._completed_size = 0
-
-        for file_path, status in self._file_statuses.items():
+        # コピーがすべて終わっていれば、コピー中に発生した例外をここで送出する
+        if self._futures and all(future.done() for future in self._futures):
+            futures, self._futures = self._futures, []
+            for future in futures:
+                future.result()
+
+        # すべてのコピーが終わり、すべてのファイルが変更済みなら、オーバーレイを確認せずに前回の進捗を返す
+        if not self._futures and not self._pending_files:
+            return self._progress
+
+        # 未変更のファイルだけを取得
+        with self._lock:
+            pending = [(file_path, self._initial_overlays[self._path_indices[file_path]]) for file_path in self._pending_files]
+
+        changed_files = []
+        for file_path, initial_overlay in pending:
             current_overlay = self._overlay_icon_fetcher.get_overlay_index(file_path)
             # 初期オーバーレイと異なれば "changed" とする
-            if current_overlay is not None and current_overlay != status["initial_overlay"]:
-                status["changed"] = True
+            if current_overlay is not None and current_overlay != initial_overlay:
+                changed_files.append(file_path)
 
-            if status["changed"]:
-                self._completed_size += status["size"]
+        with self._lock:
+            for file_path in changed_files:
+                if file_path not in self._pending_files:
+                    continue  # 確認中に状態管理から削除された
+                i = self._path_indices[file_path]
+                self._changed[i] = 1
+                self._completed_size += self._sizes[i]
+                self._pending_files.discard(file_path)
 
-        if self._total_size > 0:
-            self._progress = int((self._completed_size / self._total_size) * 100)
+            if self._total_size > 0:
+                self._progress = int(((self._copied_size + self._completed_size) / (2 * self._total_size)) * 100)
 
         return self._progress
 
+    def is_copying(self) -> bool:
+        """コピー中のファイルがあるかを返す。
+
+        戻り値
+        -------
+        bool
+            完了していないコピー処理があれば True。
+        """
+        return any(not future.done() for future in self._futures)
+
+    def wait_for_copies(self) -> None:
+        """実行中のコピーがすべて終わるまで待つ。
+
+        コピー元のファイルを削除する前に呼び出すこと。コピー中に発生した例外は送出しない。
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
     def delete_file(self, path: str) -> None:
         """指定されたファイルを削除し、状態管理から削除する。
 
@@ -263,11 +411,70 @@ class UploadManager:
         -----
         ファイルが `dst_folder` に存在しないか、`changed` 状態でない場合は何も行わず無視する。
         """
-        full_path = os.path.join(self._dst_folder, os.path.relpath(path, self._src_dir))
+        full_path = self._get_new_path(path)
+
+        with self._lock:
+            index = self._path_indices.get(full_path)
+
+            if index is not None and self._changed[index]:
+                try:
+                    os.remove(full_path)
+                    self._copied_size -= self._sizes[index]
+                    self._completed_size -= self._sizes[index]
+                    self._remove_status(index)
+                except FileNotFoundError:
+                    pass  # ファイルが存在しない場合は無視
+
+    def _clear_statuses(self) -> None:
+        """状態管理用の配列をすべて空にする。"""
+        self._paths.clear()
+        self._path_indices.clear()
+        self._pending_files.clear()
+        del self._initial_overlays[:]
+        del self._sizes[:]
+        self._changed.clear()
+
+    def _add_status(self, path: str, initial_overlay: int, size: int) -> None:
+        """ファイルの状態を状態管理用の配列の末尾に追加する。
 
-        if full_path in self._file_statuses and self._file_statuses[full_path]["changed"]:
-            try:
-                os.remove(full_path)
-                del self._file_statuses[full_path]
-            except FileNotFoundError:
-                pass  # ファイルが存在しない場合は無視
+        引数
+        ----------
+        path : str
+            コピー先ファイルのパス。
+        initial_overlay : int
+            コピー直後のオーバーレイアイコンインデックス。
+        size : int
+            ファイルのバイトサイズ。
+        """
+        self._path_indices[path] = len(self._paths)
+        self._pending_files.add(path)
+        self._paths.append(path)
+        self._initial_overlays.append(initial_overlay)
+        self._sizes.append(size)
+        self._changed.append(0)
+
+    def _remove_status(self, index: int) -> None:
+        """指定されたインデックスのファイルの状態を削除する。
+
+        末尾の要素を削除位置に移動してから末尾を取り除くため、順序は保持されない。
+
+        引数
+        ----------
+        index : int
+            削除するファイルの _paths 内のインデックス。
+        """
+        last = len(self._paths) - 1
+        del self._path_indices[self._paths[index]]
+        self._pending_files.discard(self._paths[index])
+
+        if index != last:
+            self._paths[index] = self._paths[last]
+            self._initial_overlays[index] = self._initial_overlays[last]
+            self._sizes[index] = self._sizes[last]
+            self._changed[index] = self._changed[last]
+            self._path_indices[self._paths[index]] = index
+
+        self._paths.pop()
+        self._initial_overlays.pop()
+        self._sizes.pop()
+        self._changed.pop()
@@ -1,4 +1,17 @@
-import pygetwindow as gw
+import ctypes
+import ctypes.wintypes
+import time
+
+# VSCode(Electron)のトップレベルウィンドウのクラス名
+VSCODE_WINDOW_CLASS = "Chrome_WidgetWin_1"
+# VSCodeのウィンドウタイトルに含まれる文字列
+VSCODE_WINDOW_TITLE = "Visual Studio Code"
+
+# is_vscode_running の結果を再利用する秒数
+_CACHE_TTL = 0.5
+
+_cache_t = -1.0
+_cache_v = False
 
 
 class VSCodeMonitor:
@@ -6,8 +19,35 @@ class VSCodeMonitor:
 
     @staticmethod
     def is_vscode_running() -> bool:
-        """VSCodeのウィンドウが存在するかを確認"""
-        for window in gw.getAllTitles():
-            if "Visual Studio Code" in window:
-                return True
+        """VSCodeのウィンドウが存在するかを確認
+
+        直前の確認から _CACHE_TTL 秒以内であれば、前回の結果を返す。
+        """
+        global _cache_t, _cache_v
+
+        now = time.monotonic()
+        if _cache_t >= 0 and now - _cache_t < _CACHE_TTL:
+            return _cache_v
+
+        _cache_v = VSCodeMonitor._enumerate()
+        _cache_t = now
+        return _cache_v
+
+    @staticmethod
+    def _enumerate() -> bool:
+        """Electronのクラス名を持つ表示中のウィンドウだけを列挙し、VSCodeのウィンドウが存在するかを確認"""
+        user32 = ctypes.windll.user32
+        user32.FindWindowExW.argtypes = (ctypes.wintypes.HWND, ctypes.wintypes.HWND, ctypes.wintypes.LPCWSTR, ctypes.wintypes.LPCWSTR)
+        user32.FindWindowExW.restype = ctypes.wintypes.HWND
+        user32.IsWindowVisible.argtypes = (ctypes.wintypes.HWND,)
+        user32.GetWindowTextW.argtypes = (ctypes.wintypes.HWND, ctypes.wintypes.LPWSTR, ctypes.c_int)
+        title_buffer = ctypes.create_unicode_buffer(512)
+
+        hwnd = user32.FindWindowExW(None, None, VSCODE_WINDOW_CLASS, None)
+        while hwnd:
+            if user32.IsWindowVisible(hwnd):
+                user32.GetWindowTextW(hwnd, title_buffer, len(title_buffer))
+                if VSCODE_WINDOW_TITLE in title_buffer.value:
+                    return True
+            hwnd = user32.FindWindowExW(None, hwnd, VSCODE_WINDOW_CLASS, None)
         return False
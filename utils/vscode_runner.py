@@ -19,6 +19,8 @@ class VSCodeRunner:
         実行するVSCodeコマンドをリスト形式で保持。
     _workspace_id : Optional[str]
         検出されたworkspaceのID。
+    _storage_json_cache : Optional[tuple[int, dict]]
+        解析済みのstorage.jsonと、その時点のファイル更新時刻(ナノ秒)。
     """
 
     def __init__(self, vs_code_path: str, workspace_file_path: str) -> None:
@@ -33,6 +35,7 @@ class VSCodeRunner:
             ワークスペースファイルへのパス。
         """
         self._command = (vs_code_path, workspace_file_path, "--verbose", "-n")
+        self._storage_json_cache: tuple[int, dict] | None = None
 
     def run_and_wait(self) -> None:
         """
@@ -56,9 +59,7 @@ class VSCodeRunner:
         None
         """
 
-        storage_json_path_resolved = resolve_path(STORAGE_JSON_PATH)
-        with open(storage_json_path_resolved) as f:
-            storage_json_dict = json.load(f)
+        storage_json_dict = self._load_storage_json(resolve_path(STORAGE_JSON_PATH))
 
         workspace_id = storage_json_dict["windowsState"]["lastActiveWindow"]["workspaceIdentifier"]["id"]
 
@@ -76,13 +77,44 @@ class VSCodeRunner:
         """
 
         storage_json_path_resolved = resolve_path(STORAGE_JSON_PATH)
-        with open(storage_json_path_resolved) as f:
-            storage_json_dict = json.load(f)
+        storage_json_dict = self._load_storage_json(storage_json_path_resolved)
 
         storage_json_dict["windowsState"] = dict()
 
-        with open(storage_json_path_resolved, "w") as f:
-            json.dump(storage_json_dict, f, indent=4)
+        # VSCodeは整形の有無を問わないため、インデントなしで書き出す
+        with open(storage_json_path_resolved, "wb") as f:
+            f.write(json.dumps(storage_json_dict).encode("UTF-8"))
+
+        # 書き込んだ内容をそのまま次回の読み込みに使う
+        self._storage_json_cache = (os.stat(storage_json_path_resolved).st_mtime_ns, storage_json_dict)
+
+    def _load_storage_json(self, storage_json_path: str) -> dict:
+        """
+        storage.jsonを読み込み、解析済みの辞書を返す。
+
+        ファイルの更新時刻が前回の読み込み時から変わっていなければ、前回の解析結果を返す。
+
+        引数
+        ----------
+        storage_json_path : str
+            storage.jsonのパス。
+
+        戻り値
+        -------
+        dict
+            解析済みのstorage.json。
+        """
+        mtime_ns = os.stat(storage_json_path).st_mtime_ns
+
+        cached = self._storage_json_cache
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+
+        with open(storage_json_path, "rb") as f:
+            storage_json_dict = json.loads(f.read())
+
+        self._storage_json_cache = (mtime_ns, storage_json_dict)
+        return storage_json_dict
 
 
 if __name__ == "__main__":
@@ -1,3 +1,6 @@
+import re
+
+
 class WorkspacePlaceholderReplacer:
     """
     VSCodeのワークスペースファイル内のプレースホルダーを置き換えるクラス。
@@ -29,6 +32,9 @@ class WorkspacePlaceholderReplacer:
         self._input_file_path = input_file_path
         self._output_file_path = output_file_path
         self._replacements = replacements
+        # すべてのプレースホルダーを1回の走査で置き換えるための正規表現（長いものを優先）
+        placeholders = sorted(replacements, key=len, reverse=True)
+        self._pattern = re.compile("|".join(map(re.escape, placeholders))) if placeholders else None
 
     def _read_file(self) -> str:
         """
@@ -56,9 +62,9 @@ class WorkspacePlaceholderReplacer:
         str
             プレースホルダーが実際のパスに置き換えられた内容。
         """
-        for placeholder, actual_path in self._replacements.items():
-            content = content.replace(placeholder, actual_path)
-        return content
+        if self._pattern is None:
+            return content
+        return self._pattern.sub(lambda match: self._replacements[match.group(0)], content)
 
     def _write_file(self, content: str) -> None:
         """